@@ -1,15 +1,20 @@
 from abc import ABC
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
-from requests import post
+from requests import Response
 from tqdm import tqdm
 from typing import Dict, FrozenSet, Iterable, List, Union, Tuple
 
-from .dependencies import Package, PackageRepository, Vulnerability
+from .dependencies import Package, PackageRepository, Vulnerability, get_session
 
 logger = logging.getLogger(__name__)
 
 
+def post(url: str, **kwargs) -> Response:
+    """POSTs to `url` using the calling thread's shared session"""
+    return get_session().post(url, **kwargs)
+
+
 class OSVVulnerability(Vulnerability):
     """Represents a vulnerability from the OSV project"""
 
@@ -76,20 +76,18 @@ def get_dependencies(
             _class = Package
             kwargs = {}
 
-        dependencies: Dict[str, Dependency] = {}
+        specs: Dict[str, BaseSpec] = {}
         for dep in package["dependencies"]:
             if dep["kind"] is not None:
                 continue
-            if dep["name"] in dependencies:
-                dependencies[dep["name"]].semantic_version = dependencies[
-                    dep["name"]
-                ].semantic_version | CargoResolver.parse_spec(dep["req"])
+            if dep["name"] in specs:
+                specs[dep["name"]] = specs[dep["name"]] | CargoResolver.parse_spec(dep["req"])
             else:
-                dependencies[dep["name"]] = Dependency(
-                    package=dep["name"],
-                    semantic_version=CargoResolver.parse_spec(dep["req"]),
-                    source=CargoResolver(),
-                )
+                specs[dep["name"]] = CargoResolver.parse_spec(dep["req"])
+        dependencies: Dict[str, Dependency] = {
+            name: Dependency(package=name, semantic_version=spec, source=CargoResolver())
+            for name, spec in specs.items()
+        }
 
         yield _class(  # type: ignore
             name=package["name"],
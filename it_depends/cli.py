@@ -148,6 +148,12 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         default=None,
         help="maximum number of jobs to run concurrently" " (default is # of CPUs)",
     )
+    parser.add_argument(
+        "--executor",
+        choices=("thread", "process"),
+        default="thread",
+        help="whether concurrent jobs run in threads or in separate processes (default is thread)",
+    )
     parser.add_argument(
         "--version",
         "-v",
@@ -254,6 +260,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                         cache=cache,
                         depth_limit=args.depth_limit,
                         max_workers=args.max_workers,
+                        executor=args.executor,
                     )
                 except ValueError as e:
                     if not args.clear_cache or args.PATH_OR_NAME.strip():
@@ -275,6 +282,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
                         cache=cache,
                         depth_limit=args.depth_limit,
                         max_workers=args.max_workers,
+                        executor=args.executor,
                     )
                     output_file.write(
                         str(
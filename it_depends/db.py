@@ -94,6 +94,10 @@ class DBDependency(Base, Dependency):  # type: ignore
     def semantic_version(self, new_version: Union[SemanticVersion, str]):
         self.semantic_version_string = str(new_version)
 
+    def __hash__(self):
+        # database rows can change underneath us, so unlike Dependency we do not cache the hash
+        return hash((self.source, self.package, self.semantic_version))
+
 
 class DependencyMapping:
     def __init__(self, package: "DBPackage"):
@@ -187,6 +191,10 @@ class DBPackage(Base, Package):  # type: ignore
             ),
         )
 
+    def __hash__(self):
+        # database rows can change underneath us, so unlike Package we do not cache the hash
+        return hash((self.version, self.name, self.version))
+
     @property
     def version(self) -> Version:
         return self.resolver.parse_version(self.version_str)
@@ -227,6 +235,9 @@ class SourceFilteredPackageCache(PackageCache):
     def set_resolved(self, dependency: Dependency):
         self.parent.set_resolved(dependency)
 
+    def set_resolved_many(self, dependencies: Iterable[Dependency]):
+        self.parent.set_resolved_many(dependencies)
+
     def from_source(self, source: Optional[str]) -> "PackageCache":
         return SourceFilteredPackageCache(source, self.parent)
 
@@ -257,6 +268,9 @@ class SourceFilteredPackageCache(PackageCache):
     def set_updated(self, package: Package, resolver: str):
         return self.parent.set_updated(package, resolver)
 
+    def set_updated_many(self, updates: Iterable[Tuple[Package, str]]):
+        return self.parent.set_updated_many(updates)
+
     def was_updated(self, package: Package, resolver: str) -> bool:
         return self.parent.was_updated(package, resolver)
 
@@ -325,6 +339,20 @@ class DBPackageCache(PackageCache):
     def __len__(self):
         return self.session.query(DBPackage).count()
 
+    def __contains__(self, pkg: Package):
+        # compare exactly rather than with `_make_query`, whose LIKE treats `_` and `%` as wildcards and ignores case
+        return (
+            self.session.query(DBPackage)
+            .filter(
+                DBPackage.name == pkg.name,
+                DBPackage.version_str == str(pkg.version),
+                DBPackage.source == pkg.source,
+            )
+            .limit(1)
+            .count()
+            > 0
+        )
+
     def __iter__(self) -> Iterator[Package]:
         yield from self.session.query(DBPackage).all()
 
@@ -392,15 +420,20 @@ class DBPackageCache(PackageCache):
         )
 
     def set_resolved(self, dependency: Dependency):
-        if self.was_resolved(dependency):
-            return
-        self.session.add(
-            Resolution(
-                package=dependency.package,
-                version=str(dependency.semantic_version),
-                source=dependency.source,
+        self.set_resolved_many((dependency,))
+
+    def set_resolved_many(self, dependencies: Iterable[Dependency]):
+        # all of the resolutions are committed in a single transaction
+        for dependency in dependencies:
+            if self.was_resolved(dependency):
+                continue
+            self.session.add(
+                Resolution(
+                    package=dependency.package,
+                    version=str(dependency.semantic_version),
+                    source=dependency.source,
+                )
             )
-        )
         self.session.commit()
 
     def updated_by(self, package: Package) -> FrozenSet[str]:
@@ -430,14 +463,19 @@ class DBPackageCache(PackageCache):
         )
 
     def set_updated(self, package: Package, resolver: str):
-        if self.was_updated(package, resolver):
-            return
-        self.session.add(
-            Updated(
-                package=package.name,
-                version=str(package.version),
-                source=package.source,
-                resolver=resolver,
+        self.set_updated_many(((package, resolver),))
+
+    def set_updated_many(self, updates: Iterable[Tuple[Package, str]]):
+        # all of the updates are committed in a single transaction
+        for package, resolver in updates:
+            if self.was_updated(package, resolver):
+                continue
+            self.session.add(
+                Updated(
+                    package=package.name,
+                    version=str(package.version),
+                    source=package.source,
+                    resolver=resolver,
+                )
             )
-        )
         self.session.commit()
@@ -1,19 +1,28 @@
 import atexit
-from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 import functools
+import heapq
+from importlib import import_module
+import itertools
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from contextlib import contextmanager
 from dataclasses import dataclass
 import json
 import logging
+import multiprocessing
 from multiprocessing import cpu_count
 from pathlib import Path
+from queue import Empty, SimpleQueue
 from shutil import rmtree
 from subprocess import check_call
 import sys
 from tempfile import mkdtemp
+import threading
+import weakref
 from typing import (
     Any,
+    Callable,
     Dict,
     FrozenSet,
     Iterable,
@@ -22,10 +31,12 @@ from typing import (
     Optional,
     Set,
     Tuple,
+    Type,
     Union,
 )
 
 from graphviz import Digraph
+import requests
 from semantic_version import SimpleSpec, Version
 from semantic_version.base import BaseSpec as SemanticVersion
 from tqdm import tqdm
@@ -127,18 +138,37 @@ class Dependency:
             return False
         return self.semantic_version.clause.includes(other.semantic_version.clause)
 
+    def __getstate__(self):
+        # string hashes are salted per process, so a cached hash must not travel to worker processes
+        state = self.__dict__.copy()
+        state.pop("_hash", None)
+        return state
+
     def __hash__(self):
-        return hash((self.source, self.package, self.semantic_version))
+        # dependencies are hashed constantly while resolving (and hashing a version spec walks its whole clause),
+        # so the hash is computed once; dependencies must therefore not be modified after they are hashed
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash: int = hash((self.source, self.package, self.semantic_version))
+            return self._hash
 
     def match(self, package: "Package") -> bool:
         """True if package is a solution for this dependency"""
         return (
             package.source == self.source
             and package.name == self.package
-            and self.semantic_version.match(package.version)
+            and _matches_version(self, package.version)
         )
 
 
+@functools.lru_cache(maxsize=65536)
+def _matches_version(dependency: Dependency, version: Version) -> bool:
+    """Memoized `dependency.semantic_version.match(version)`; matching walks the spec's clauses in pure Python and the
+    same (dependency, version) pairs are checked many times over while resolving"""
+    return dependency.semantic_version.match(version)
+
+
 class AliasedDependency(Dependency):
     """An Aliased Dependency represents a dependency that has been aliased in a project.
 
@@ -192,7 +222,10 @@ class Package:
         return f"{self.source}:{self.name}"
 
     def update_dependencies(self, dependencies: FrozenSet[Dependency]):
-        self.dependencies = self.dependencies.union(dependencies)
+        updated = self.dependencies.union(dependencies)
+        if len(updated) != len(self.dependencies):
+            # only replace the set if something was added, so callers can detect a no-op by identity
+            self.dependencies = updated
         return self
 
     def update_vulnerabilities(self, vulnerabilities: FrozenSet[Vulnerability]):
@@ -270,7 +303,9 @@ class Package:
         return self.name == other.name and self.source == other.source
 
     def __eq__(self, other):
-        if isinstance(other, Package):
+        if other is self:
+            return True
+        elif isinstance(other, Package):
             return (
                 other.name == self.name
                 and other.source == self.source
@@ -285,8 +320,20 @@ class Package:
             other.version,
         )
 
+    def __getstate__(self):
+        # string hashes are salted per process, so a cached hash must not travel to worker processes
+        state = self.__dict__.copy()
+        state.pop("_hash", None)
+        return state
+
     def __hash__(self):
-        return hash((self.version, self.name, self.version))
+        # as with Dependency, the hash (which hashes the version twice) is only computed once; a package's name,
+        # source, and version must therefore not be modified after it is hashed
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash: int = hash((self.version, self.name, self.version))
+            return self._hash
 
 
 class SourceRepository:
@@ -498,11 +545,21 @@ class PackageCache(ABC):
         """True if this particular dependency as resolved"""
         raise NotImplementedError()
 
+    def set_resolved_many(self, dependencies: Iterable[Dependency]):
+        """Equivalent to calling `set_resolved` for each dependency"""
+        for dependency in dependencies:
+            self.set_resolved(dependency)
+
     @abstractmethod
     def set_updated(self, package: Package, resolver: str):
         """Update package for updates made by resolver"""
         raise NotImplementedError()
 
+    def set_updated_many(self, updates: Iterable[Tuple[Package, str]]):
+        """Equivalent to calling `set_updated` for each (package, resolver) pair"""
+        for package, resolver in updates:
+            self.set_updated(package, resolver)
+
     @abstractmethod
     def was_updated(self, package: Package, resolver: str) -> bool:
         """True if package was updated by resolver"""
@@ -562,7 +619,6 @@ class PackageCache(ABC):
             graph.add_node(package)  # type: ignore
             for dep in package.dependencies:
                 for p in self.match(dep):
-                    assert p in self
                     graph.add_edge(package, p, dependency=dep)  # type: ignore
         return graph
 
@@ -682,20 +738,24 @@ class InMemoryPackageCache(PackageCache):
     def __len__(self):
         return sum(sum(map(len, source.values())) for source in self._cache.values())
 
+    def __contains__(self, pkg: Package):
+        return self._cache.get(pkg.source, {}).get(pkg.name, {}).get(pkg.version) == pkg
+
     def __iter__(self) -> Iterator[Package]:
         return (p for d in self._cache.values() for v in d.values() for p in v.values())
 
     def updated_by(self, package: Package) -> FrozenSet[str]:
-        return frozenset(self._updated[package])
+        return frozenset(self._updated.get(package, ()))
 
     def was_updated(self, package: Package, resolver: str) -> bool:
-        return resolver in self._updated[package]
+        # use .get() so that lookups of unknown packages do not insert empty entries into the defaultdict
+        return resolver in self._updated.get(package, ())
 
     def set_updated(self, package: Package, resolver: str):
         self._updated[package].add(resolver)
 
     def was_resolved(self, dependency: Dependency) -> bool:
-        return dependency in self._resolved[f"{dependency.source}:{dependency.package}"]
+        return dependency in self._resolved.get(f"{dependency.source}:{dependency.package}", ())
 
     def set_resolved(self, dependency: Dependency):
         self._resolved[f"{dependency.source}:{dependency.package}"].add(dependency)
@@ -743,28 +803,36 @@ class InMemoryPackageCache(PackageCache):
         return "[" + ",".join(self.package_full_names()) + "]"
 
 
+_thread_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    """Returns an HTTP session that is shared by everything running on the calling thread
+
+    Resolvers should use this rather than constructing their own sessions or connections, so that resolver
+    worker threads keep reusing the same (already established) keep-alive connections.
+    """
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+    return session
+
+
 @functools.lru_cache()
 def resolvers() -> FrozenSet["DependencyResolver"]:
     """Collection of all the default instances of DependencyResolvers"""
-    return frozenset(cls() for cls in DependencyResolver.__subclasses__())  # type: ignore
+    return frozenset(cls() for cls in DependencyResolver._registry.values())  # type: ignore
 
 
 @functools.lru_cache()
 def resolver_by_name(name: str) -> "DependencyResolver":
     """Finds a resolver instance by name. The result is cached."""
-    for instance in resolvers():
-        if instance.name == name:
-            return instance
-    raise KeyError(name)
+    return DependencyResolver._registry[name]()  # type: ignore
 
 
 def is_known_resolver(name: str) -> bool:
     """Checks if name is a valid/known resolver name"""
-    try:
-        resolver_by_name(name)
-        return True
-    except KeyError:
-        return False
+    return name in DependencyResolver._registry
 
 
 class ResolverAvailability:
@@ -788,11 +856,17 @@ class DockerSetup:
 
 
 class DependencyResolver:
-    """Finds a set of Packages that agrees with a Dependency specification"""
+    """Finds a set of Packages that agrees with a Dependency specification
+
+    Resolvers may be called concurrently from several threads; any HTTP requests they make should go through
+    `get_session()`.
+    """
 
     name: str
     description: str
     _instance = None
+    # every resolver class by name; weak, so that resolver classes that go out of scope (e.g., in tests) disappear
+    _registry: "weakref.WeakValueDictionary[str, Type[DependencyResolver]]" = weakref.WeakValueDictionary()
 
     def __new__(class_, *args, **kwargs):
         """A singleton (Only one default instance exists)"""
@@ -805,7 +879,12 @@ class DependencyResolver:
             raise TypeError(f"{cls.__name__} must define a `name` class member")
         elif not hasattr(cls, "description") or cls.description is None:
             raise TypeError(f"{cls.__name__} must define a `description` class member")
-        resolvers.cache_clear()
+        if DependencyResolver in cls.__bases__:
+            # like `DependencyResolver.__subclasses__()`, only direct subclasses are resolvers; deeper subclasses
+            # (e.g., specializations of an existing resolver) are not registered in their own right
+            DependencyResolver._registry[cls.name] = cls
+            resolvers.cache_clear()
+            resolver_by_name.cache_clear()
 
     @abstractmethod
     def resolve(self, dependency: Dependency) -> Iterator[Package]:
@@ -858,6 +937,26 @@ class PackageRepository(InMemoryPackageCache):
     pass
 
 
+@functools.lru_cache(maxsize=256)
+def _cached_can_resolve_from_source(resolver_name: str, path: Path, modified: int) -> bool:
+    return resolver_by_name(resolver_name).can_resolve_from_source(SourceRepository(path))
+
+
+def _can_resolve_from_source(resolver: DependencyResolver, repo: SourceRepository) -> bool:
+    """
+    A memoized version of `resolver.can_resolve_from_source(repo)`.
+
+    The result is keyed on the modification time of the repository directory, so it is invalidated whenever files are
+    added to or removed from the root of the repository.
+    """
+    path = repo.path.absolute()
+    try:
+        modified = path.stat().st_mtime_ns
+    except OSError:
+        return resolver.can_resolve_from_source(repo)
+    return _cached_can_resolve_from_source(resolver.name, path, modified)
+
+
 class _DependencyResult:
     def __init__(self, dep: Dependency, packages: List[Package], depth: int):
         self.dep: Dependency = dep
@@ -865,8 +964,12 @@ class _DependencyResult:
         self.depth: int = depth
 
 
-def _process_dep(dep: Dependency, depth: int) -> _DependencyResult:
-    return _DependencyResult(dep=dep, packages=list(dep.resolver.resolve(dep)), depth=depth)
+def _process_dep(
+    dep: Dependency, depth: int, resolver: Optional["DependencyResolver"] = None
+) -> _DependencyResult:
+    if resolver is None:
+        resolver = dep.resolver
+    return _DependencyResult(dep=dep, packages=list(resolver.resolve(dep)), depth=depth)
 
 
 class _PackageResult:
@@ -883,27 +986,133 @@ class _PackageResult:
         self.depth: int = depth
 
 
-def _update_package(package: Package, depth: int) -> _PackageResult:
+def _update_package(
+    package: Package, depth: int, updaters: Optional[Iterable["DependencyResolver"]] = None
+) -> _PackageResult:
+    """Updates package with every resolver in `updaters` (by default, every resolver that can update it)"""
+    if updaters is None:
+        updaters = [r for r in resolvers() if r.can_update_dependencies(package)]
     old_deps = frozenset(package.dependencies)
     uir: List[str] = []
-    for resolver in resolvers():
-        if resolver.can_update_dependencies(package):
-            package = resolver.update_dependencies(package)
-            uir.append(resolver.name)
+    for resolver in updaters:
+        package = resolver.update_dependencies(package)
+        uir.append(resolver.name)
     return _PackageResult(
         package=package,
-        was_updated=package.dependencies != old_deps,
+        was_updated=package.dependencies is not old_deps and package.dependencies != old_deps,
         updated_in_resolvers=uir,
         depth=depth,
     )
 
 
+def _initial_dependency_work(
+    dependency: Dependency, cache: PackageCache
+) -> Tuple[List[Dependency], List[Package]]:
+    return [dependency], []
+
+
+def _initial_package_work(
+    package: Package, cache: PackageCache
+) -> Tuple[List[Dependency], List[Package]]:
+    return [], [package]
+
+
+def _initial_source_work(
+    repo: SourceRepository, cache: PackageCache
+) -> Tuple[List[Dependency], List[Package]]:
+    source_packages: List[Package] = []
+    for resolver in resolvers():
+        if _can_resolve_from_source(resolver, repo):
+            source_package = resolver.resolve_from_source(repo, cache=cache)
+            if source_package is not None:
+                source_packages.append(source_package)
+    if not source_packages:
+        raise ValueError(f"Can not resolve {repo}")
+    return [], source_packages
+
+
+_INITIAL_WORK: Dict[type, Callable[[Any, PackageCache], Tuple[List[Dependency], List[Package]]]] = {
+    Dependency: _initial_dependency_work,
+    Package: _initial_package_work,
+    SourceRepository: _initial_source_work,
+}
+
+
+def _initial_work(
+    repo_or_spec: Union[Package, Dependency, SourceRepository], cache: PackageCache
+) -> Tuple[List[Dependency], List[Package]]:
+    """Returns the dependencies and packages that `resolve()` starts from, dispatching on the type of repo_or_spec"""
+    handler = _INITIAL_WORK.get(type(repo_or_spec))
+    if handler is None:
+        for cls in type(repo_or_spec).__mro__:
+            if cls in _INITIAL_WORK:
+                # cache the handler for subclasses like SourcePackage or AliasedDependency
+                handler = _INITIAL_WORK[type(repo_or_spec)] = _INITIAL_WORK[cls]
+                break
+        else:
+            raise ValueError(f"repo_or_spec must be either a Package, Dependency, or SourceRepository")
+    return handler(repo_or_spec, cache)
+
+
+def _init_worker_process():
+    # make sure every resolver is registered in the worker process, not just those whose objects were unpickled
+    import_module(__name__.split(".")[0])
+
+
+def _make_pool(executor: str, max_workers: int) -> Executor:
+    if executor == "process":
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+        else:
+            context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=context, initializer=_init_worker_process
+        )
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="it-depends-resolver")
+
+
+def _shutdown_pool(pool: Optional[Executor], cancel: bool = False):
+    """Shuts down a resolver pool; if `cancel` is True, do not wait for jobs that are still running"""
+    if pool is None:
+        return
+    if not cancel:
+        pool.shutdown(wait=True)
+    elif sys.version_info >= (3, 9):
+        pool.shutdown(wait=False, cancel_futures=True)
+    else:
+        pool.shutdown(wait=False)
+
+
+@contextmanager
+def _resolver_pool(
+    pool: Optional[Executor], executor: str, max_workers: int
+) -> Iterator[Optional[Executor]]:
+    """
+    Yields the pool to run resolver jobs in: `pool` itself if it was provided by the caller, otherwise a new pool
+    that is always shut down on exit (or None if `max_workers` allows no concurrency)
+    """
+    if pool is not None or max_workers <= 1:
+        yield pool
+        return
+    owned_pool = _make_pool(executor, max_workers)
+    try:
+        yield owned_pool
+    except BaseException:
+        # don't block on in-flight jobs when resolution is being abandoned
+        _shutdown_pool(owned_pool, cancel=True)
+        raise
+    # every future has completed by the time resolution finishes normally, so this does not block
+    _shutdown_pool(owned_pool)
+
+
 def resolve(
     repo_or_spec: Union[Package, Dependency, SourceRepository],
     cache: Optional[PackageCache] = None,
     depth_limit: int = -1,
     repo: Optional[PackageRepository] = None,
     max_workers: Optional[int] = None,
+    executor: str = "thread",
+    pool: Optional[Executor] = None,
 ) -> PackageRepository:
     """
     Resolves the dependencies for a package, dependency, or source repository.
@@ -911,6 +1120,9 @@ def resolve(
     If depth_limit is negative (the default), recursively resolve all dependencies.
     If depth_limit is greater than zero, only recursively resolve dependencies to that depth.
     max_workers controls the number of spawned threads, if None cpu_count is used.
+    executor is either "thread" (the default) or "process"; the latter runs resolvers in worker processes, which
+    avoids contending for the GIL with resolvers that do a lot of parsing in Python.
+    An existing pool can be passed to be reused instead; it is then left running for the caller to shut down.
     """
     if depth_limit == 0:
         return PackageRepository()
@@ -927,43 +1139,84 @@ def resolve(
     if cache is None:
         cache = InMemoryPackageCache()  # Some resolvers may use it to save temporary results
 
+    if executor not in ("thread", "process"):
+        raise ValueError(f"executor must be either \"thread\" or \"process\", not {executor!r}")
+
     try:
-        with cache, tqdm(
-            desc=f"resolving {repo_or_spec!s}", leave=False, unit=" dependencies"
+        with cache, _resolver_pool(pool, executor, max_workers) as pool, tqdm(
+            desc=f"resolving {repo_or_spec!s}", leave=False, unit=" dependencies", mininterval=0.25
         ) as t:
-            if isinstance(repo_or_spec, Dependency):
-                unresolved_dependencies: List[Tuple[Dependency, int]] = [(repo_or_spec, 0)]
-                unupdated_packages: List[Tuple[Package, int]] = []
-            elif isinstance(repo_or_spec, Package):
-                unresolved_dependencies = []
-                unupdated_packages = [(repo_or_spec, 0)]
-            elif isinstance(repo_or_spec, SourceRepository):
-                # repo_or_spec is a SourceRepository
-                unresolved_dependencies = []
-                unupdated_packages = []
-                found_source_package = False
-                for resolver in resolvers():
-                    if resolver.can_resolve_from_source(repo_or_spec):
-                        source_package = resolver.resolve_from_source(repo_or_spec, cache=cache)
-                        if source_package is None:
-                            continue
-                        found_source_package = True
-                        unupdated_packages.append((source_package, 0))
-                if not found_source_package:
-                    raise ValueError(f"Can not resolve {repo_or_spec}")
-            else:
-                raise ValueError(
-                    f"repo_or_spec must be either a Package, Dependency, or SourceRepository"
-                )
-
-            t.total = len(unupdated_packages) + len(unresolved_dependencies)
-
-            futures: Set[Future[Union[_DependencyResult, _PackageResult]]] = set()
-            queued: Set[Dependency] = {d for d, _ in unresolved_dependencies}
-            if max_workers > 1:
-                pool = ThreadPoolExecutor(
-                    max_workers=max_workers, thread_name_prefix="it-depends-resolver"
-                )
+            # newly discovered work is checked against the cache exactly once, as soon as it is discovered;
+            # only work that actually needs a resolver is moved on to the work queues
+            new_dependencies: List[Tuple[int, Dependency]] = []
+            new_packages: List[Tuple[int, Package]] = []
+            # both work queues are min-heaps keyed on depth so that one depth level is drained before moving on to
+            # the next; within a level, dependencies are ordered by source and package name, and a sequence number
+            # breaks any remaining ties (so the items themselves are never compared)
+            sequence = itertools.count()
+            unresolved_dependencies: List[Tuple[int, str, str, int, Dependency]] = []
+            unupdated_packages: List[Tuple[int, int, Package]] = []
+            initial_dependencies, initial_packages = _initial_work(repo_or_spec, cache)
+            new_dependencies.extend((0, dep) for dep in initial_dependencies)
+            new_packages.extend((0, package) for package in initial_packages)
+
+            t.total = len(new_packages) + len(new_dependencies)
+            # progress bar changes are accumulated here and flushed once per iteration of the main loop,
+            # rather than locking and refreshing the progress bar for every single result
+            pending_updates = 0
+            pending_total = 0
+            # likewise, writes to the cache are batched and flushed before the cache is next consulted
+            cache_additions: List[Package] = []
+            cache_resolutions: List[Dependency] = []
+            cache_updates: List[Tuple[Package, str]] = []
+
+            def flush_cache_writes():
+                if cache_additions:
+                    cache.extend(cache_additions)  # type: ignore
+                    cache_additions.clear()
+                if cache_resolutions:
+                    cache.set_resolved_many(cache_resolutions)  # type: ignore
+                    cache_resolutions.clear()
+                if cache_updates:
+                    cache.set_updated_many(cache_updates)  # type: ignore
+                    known_updated.update(cache_updates)
+                    cache_updates.clear()
+
+            # (package, resolver name) pairs known to be updated in the cache; being updated is never undone, so
+            # positive answers can be remembered for the rest of the resolution without ever being invalidated
+            known_updated: Set[Tuple[Package, str]] = set()
+
+            def was_updated(package: Package, resolver_name: str) -> bool:
+                if (package, resolver_name) in known_updated:
+                    return True
+                elif cache.was_updated(package, resolver_name):  # type: ignore
+                    known_updated.add((package, resolver_name))
+                    return True
+                return False
+
+            # the set of resolvers cannot change during a resolution, so look them up once, and remember which
+            # resolvers can update each package rather than asking every resolver again on every sweep
+            all_resolvers = tuple(resolvers())
+            resolvers_by_name = {r.name: r for r in all_resolvers}
+            package_updaters: Dict[Package, Tuple[DependencyResolver, ...]] = {}
+
+            def updaters_for(package: Package) -> Tuple[DependencyResolver, ...]:
+                updaters = package_updaters.get(package)
+                if updaters is None:
+                    updaters = package_updaters[package] = tuple(
+                        r for r in all_resolvers if r.can_update_dependencies(package)
+                    )
+                return updaters
+
+            # jobs put their own future on this queue when they finish, so waiting for the next result is O(1)
+            # regardless of how many jobs are in flight
+            completed: "SimpleQueue[Future[Union[_DependencyResult, _PackageResult]]]" = SimpleQueue()
+            outstanding = 0
+            # keep a few more jobs in flight than there are workers, so that a worker that finishes a job can start
+            # the next one straight away instead of idling until we have processed its result and submitted more;
+            # bounded so that the executor's own work queue cannot grow without limit
+            in_flight_cap = 2 * max_workers
+            queued: Set[Dependency] = {d for _, d in new_dependencies}
 
             def process_updated_package(
                 updated_package: Package,
@@ -971,20 +1224,21 @@ def resolve(
                 updated_in_resolvers: Set[str],
                 was_updated: bool = True,
             ):
+                nonlocal pending_total
                 repo.add(updated_package)  # type: ignore
                 if (
                     not isinstance(updated_package, SourcePackage)
                     and updated_package is not repo_or_spec
                 ):
                     if was_updated:
-                        cache.add(updated_package)  # type: ignore
+                        cache_additions.append(updated_package)
                     for r in updated_in_resolvers:
                         repo.set_updated(updated_package, r)  # type: ignore
-                        cache.set_updated(updated_package, r)  # type: ignore
+                        cache_updates.append((updated_package, r))
                 if depth_limit < 0 or at_depth < depth_limit:
                     new_deps = {d for d in updated_package.dependencies if d not in queued}
-                    unresolved_dependencies.extend((d, at_depth + 1) for d in sorted(new_deps))
-                    t.total += len(new_deps)
+                    new_dependencies.extend((at_depth + 1, d) for d in new_deps)
+                    pending_total += len(new_deps)
                     queued.update(new_deps)
 
             def process_resolution(
@@ -994,99 +1248,116 @@ def resolve(
                 already_cached: bool = False,
             ):
                 """This gets called whenever we resolve a new package"""
+                nonlocal pending_total
                 repo.set_resolved(dep)  # type: ignore
                 packages = list(packages)
-                if not already_cached and cache is not None and dep is not repo_or_spec:
-                    cache.set_resolved(dep)
-                    cache.extend(packages)
-                unupdated_packages.extend((p, at_depth) for p in packages)
-                t.total += len(packages)
-
-            while unresolved_dependencies or unupdated_packages or futures:
-                # while there are more unresolved dependencies, unupdated packages,
+                if not already_cached and cache is not None and dep != repo_or_spec:
+                    # compare by value, since worker processes return copies of the root dependency
+                    cache_resolutions.append(dep)
+                    cache_additions.extend(packages)
+                new_packages.extend((at_depth, p) for p in packages)
+                pending_total += len(packages)
+
+            def package_from_cache(package: Package, depth: int) -> bool:
+                """Processes package from the cache if every resolver that can update it already did"""
+                nonlocal pending_updates
+                updaters = updaters_for(package)
+                if any(not was_updated(package, r.name) for r in updaters):
+                    return False
+                if updaters:
+                    try:
+                        # retrieve the updated package from the cache
+                        package = next(iter(cache.match(package)))  # type: ignore
+                    except StopIteration:
+                        pass
+                process_updated_package(package, depth, updated_in_resolvers=set())
+                pending_updates += 1
+                return True
+
+            while (
+                new_dependencies
+                or new_packages
+                or unresolved_dependencies
+                or unupdated_packages
+                or outstanding
+            ):
+                # while there is more new work, unresolved dependencies, unupdated packages,
                 # or concurrent jobs that are still running:
 
-                reached_fixed_point = cache is None
-                while not reached_fixed_point:
-                    reached_fixed_point = True
-
-                    # loop through the unupdated packages and see if any are cached:
-                    not_updated: List[Tuple[Package, int]] = []
-                    was_updatable = False
-                    for package, depth in unupdated_packages:
-                        for resolver in resolvers():
-                            if resolver.can_update_dependencies(package):
-                                was_updatable = True
-                                if not cache.was_updated(package, resolver.name):
-                                    not_updated.append((package, depth))
-                                    break
+                flush_cache_writes()
+                # satisfy as much of the new work from the cache as possible; this can discover more new work,
+                # so keep going until there is none left
+                while new_packages or new_dependencies:
+                    to_check_packages, new_packages = new_packages, []
+                    for depth, package in to_check_packages:
+                        if not package_from_cache(package, depth):
+                            heapq.heappush(unupdated_packages, (depth, next(sequence), package))
+                    to_check_dependencies, new_dependencies = new_dependencies, []
+                    for depth, dep in to_check_dependencies:
+                        if dep != repo_or_spec and cache.was_resolved(dep):
+                            process_resolution(dep, cache.match(dep), depth, already_cached=True)
+                            pending_updates += 1
                         else:
-                            if was_updatable:
-                                # every resolver that could have updated this package did update it in the cache
-                                try:
-                                    # retrieve the package from the cache
-                                    package = next(iter(cache.match(package)))
-                                except StopIteration:
-                                    pass
-                            process_updated_package(package, depth, updated_in_resolvers=set())
-                            t.update(1)
-
-                    if unupdated_packages != not_updated:
-                        reached_fixed_point = False
-                        unupdated_packages = not_updated
-
-                    # loop through the unresolved deps and see if any are cached:
-                    not_cached: List[Tuple[Dependency, int]] = []
-                    for dep, depth in unresolved_dependencies:
-                        if dep is not repo_or_spec and cache.was_resolved(dep):
-                            matches = cache.match(dep)
-                            process_resolution(dep, matches, depth, already_cached=True)
-                            t.update(1)
-                        else:
-                            not_cached.append((dep, depth))
-                    if unresolved_dependencies != not_cached:
-                        reached_fixed_point = False
-                        unresolved_dependencies = not_cached
-
-                if max_workers <= 1:
+                            heapq.heappush(
+                                unresolved_dependencies, (depth, dep.source, dep.package, next(sequence), dep)
+                            )
+                    flush_cache_writes()
+
+                # an equal package may have been updated since this one was queued, so packages are checked
+                # against the cache once more when they are taken off the queue
+                if pool is None:
                     # don't use concurrency
                     if unupdated_packages:
-                        t.update(1)
-                        pkg_result = _update_package(*unupdated_packages[0])
-                        unupdated_packages = unupdated_packages[1:]
-                        process_updated_package(
-                            pkg_result.package,
-                            pkg_result.depth,
-                            pkg_result.updated_in_resolvers,
-                            pkg_result.was_updated,
-                        )
+                        depth, _, package = heapq.heappop(unupdated_packages)
+                        if not package_from_cache(package, depth):
+                            pending_updates += 1
+                            pkg_result = _update_package(package, depth, updaters_for(package))
+                            process_updated_package(
+                                pkg_result.package,
+                                pkg_result.depth,
+                                pkg_result.updated_in_resolvers,
+                                pkg_result.was_updated,
+                            )
                     if unresolved_dependencies:
-                        t.update(1)
-                        dep_result = _process_dep(*unresolved_dependencies[0])
-                        unresolved_dependencies = unresolved_dependencies[1:]
+                        pending_updates += 1
+                        depth, _, _, _, dep = heapq.heappop(unresolved_dependencies)
+                        dep_result = _process_dep(dep, depth, resolvers_by_name[dep.source])
                         process_resolution(dep_result.dep, dep_result.packages, dep_result.depth)
                 else:
-                    # new_jobs is the number of new concurrent resolutions we can start without exceeding max_workers
-                    new_jobs = max_workers - len(futures)
-                    # create `new_jobs` package update jobs:
-                    futures |= {  # type: ignore
-                        pool.submit(_update_package, package, depth)
-                        for package, depth in unupdated_packages[:new_jobs]
-                    }
-                    unupdated_packages = unupdated_packages[new_jobs:]
-                    new_jobs = max_workers - len(futures)
-                    # create `new_jobs` new resolution jobs:
-                    futures |= {  # type: ignore
-                        pool.submit(_process_dep, dep, depth)
-                        for dep, depth in unresolved_dependencies[:new_jobs]
-                    }
-                    unresolved_dependencies = unresolved_dependencies[new_jobs:]
-                    if futures:
-                        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    # start as many package update jobs as we can without exceeding in_flight_cap:
+                    while unupdated_packages and outstanding < in_flight_cap:
+                        depth, _, package = heapq.heappop(unupdated_packages)
+                        if package_from_cache(package, depth):
+                            continue
+                        pool.submit(  # type: ignore
+                            _update_package, package, depth, updaters_for(package)
+                        ).add_done_callback(completed.put)
+                        outstanding += 1
+                    # then as many new resolution jobs as we can:
+                    while unresolved_dependencies and outstanding < in_flight_cap:
+                        depth, _, _, _, dep = heapq.heappop(unresolved_dependencies)
+                        pool.submit(  # type: ignore
+                            _process_dep, dep, depth, resolvers_by_name[dep.source]
+                        ).add_done_callback(completed.put)
+                        outstanding += 1
+                    if outstanding and not (new_packages or new_dependencies):
+                        # block until at least one job finishes, then also take any others that are already done
+                        done = [completed.get()]
+                        try:
+                            while True:
+                                done.append(completed.get_nowait())
+                        except Empty:
+                            pass
+                        outstanding -= len(done)
                         for finished in done:
-                            t.update(1)
+                            pending_updates += 1
                             result = finished.result()
                             if isinstance(result, _PackageResult):
+                                if result.package is not repo_or_spec and result.package == repo_or_spec:
+                                    # worker processes return copies; keep updating the root package itself
+                                    result.package = repo_or_spec.update_dependencies(  # type: ignore
+                                        result.package.dependencies
+                                    )
                                 process_updated_package(
                                     result.package,
                                     result.depth,
@@ -1098,7 +1369,17 @@ def resolve(
                             else:
                                 raise NotImplementedError(f"Unexpected future result: {result!r}")
 
+                if pending_total:
+                    t.total += pending_total
+                    pending_total = 0
+                if pending_updates:
+                    t.update(pending_updates)
+                    pending_updates = 0
+
+            flush_cache_writes()
+
     except KeyboardInterrupt:
+        # a pool of our own has already been shut down (without waiting for in-flight requests) by this point
         if sys.stderr.isatty() and sys.stdin.isatty():
             try:
                 while True:
@@ -8,9 +8,8 @@ import re
 from subprocess import check_call, check_output, DEVNULL, CalledProcessError
 from tempfile import TemporaryDirectory
 from typing import Iterable, Iterator, List, Optional, Tuple, Union
-from urllib import request
-from urllib.error import HTTPError, URLError
 
+from requests import RequestException
 from semantic_version import Version
 from semantic_version.base import BaseSpec, Range, SimpleSpec
 
@@ -22,6 +21,7 @@ from .dependencies import (
     Package,
     PackageCache,
     SemanticVersion,
+    get_session,
 )
 from . import vcs
 
@@ -149,19 +149,17 @@ class GoModule:
     @staticmethod
     def from_github(github_org: str, github_repo: str, tag: str):
         github_url = f"https://raw.githubusercontent.com/{github_org}/{github_repo}/{tag}/go.mod"
-        try:
-            with request.urlopen(github_url) as response:
-                return GoModule.parse_mod(response.read())
-        except HTTPError as e:
-            if e.code == 404:
-                # Revert to cloning the repo
-                return GoModule.from_git(
-                    import_path=f"github.com/{github_org}/{github_repo}",
-                    git_url=f"https://github.com/{github_org}/{github_repo}",
-                    tag=tag,
-                    check_for_github=False,
-                )
-            raise
+        response = get_session().get(github_url)
+        if response.status_code == 404:
+            # Revert to cloning the repo
+            return GoModule.from_git(
+                import_path=f"github.com/{github_org}/{github_repo}",
+                git_url=f"https://github.com/{github_org}/{github_repo}",
+                tag=tag,
+                check_for_github=False,
+            )
+        response.raise_for_status()
+        return GoModule.parse_mod(response.content)
 
     @staticmethod
     def from_git(
@@ -272,8 +270,9 @@ class GoModule:
     @staticmethod
     def meta_imports_for_prefix(import_prefix: str) -> Tuple[str, List[MetaImport]]:
         url = GoModule.url_for_import_path(import_prefix)
-        with request.urlopen(url) as req:
-            return url, GoModule.parse_meta_go_imports(req.read().decode("utf-8"))
+        response = get_session().get(url)
+        response.raise_for_status()
+        return url, GoModule.parse_meta_go_imports(response.content.decode("utf-8"))
 
     @staticmethod
     def match_go_import(imports: Iterable[MetaImport], import_path: str) -> MetaImport:
@@ -300,8 +299,10 @@ class GoModule:
     def repo_root_for_import_dynamic(import_path: str) -> vcs.Repository:
         url = GoModule.url_for_import_path(import_path)
         try:
-            imports = GoModule.parse_meta_go_imports(request.urlopen(url).read().decode("utf-8"))
-        except (HTTPError, URLError):
+            response = get_session().get(url)
+            response.raise_for_status()
+            imports = GoModule.parse_meta_go_imports(response.content.decode("utf-8"))
+        except RequestException:
             raise ValueError(f"Could not download metadata from {url} for import {import_path!s}")
         meta_import = GoModule.match_go_import(imports, import_path)
         if meta_import.prefix != import_path:
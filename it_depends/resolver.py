@@ -1,6 +1,10 @@
+import functools
+import heapq
 import logging
-from collections import defaultdict
+from collections import OrderedDict
+from itertools import chain
 from logging import getLogger
+from operator import attrgetter
 from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
 
 from semantic_version.base import AllOf, BaseSpec
@@ -23,19 +27,34 @@ class CompoundSpec(BaseSpec):
         return None
 
 
+@functools.lru_cache(maxsize=4096)
+def _compound_spec(specs: Tuple[BaseSpec, ...]) -> CompoundSpec:
+    """The same combinations of requirements come up over and over while searching, so only parse each one once"""
+    return CompoundSpec(*specs)
+
+
 class PackageSet:
+    # package sets (and the resolutions below) are created for every node of the SBOM search
+    __slots__ = ("_packages", "_unsatisfied", "is_valid", "is_complete", "_hash", "_shared", "_owned_unsatisfied")
+
     def __init__(self):
         self._packages: Dict[Tuple[str, str], Package] = {}
-        self._unsatisfied: Dict[Tuple[str, str], Dict[Dependency, Set[Package]]] = \
-            defaultdict(lambda: defaultdict(set))
+        self._unsatisfied: Dict[Tuple[str, str], Dict[Dependency, Set[Package]]] = {}
         self.is_valid: bool = True
         self.is_complete: bool = True
+        # an order-independent hash of the packages in this set, maintained incrementally by `add()`
+        self._hash: int = 0
+        # `copy()` shares the dicts above between the original and the copy; whichever set is modified first makes
+        # its own (shallow) copy of the outer dicts, and then copies the inner dependency dicts one at a time as it
+        # modifies them. `_owned_unsatisfied` is None if every inner dict belongs to this set alone.
+        self._shared: bool = False
+        self._owned_unsatisfied: Optional[Set[Tuple[str, str]]] = None
 
     def __eq__(self, other):
-        return isinstance(other, PackageSet) and self._packages.values() == other._packages.values()
+        return isinstance(other, PackageSet) and self._hash == other._hash and self._packages == other._packages
 
     def __hash__(self):
-        return hash(frozenset(self._packages.values()))
+        return self._hash
 
     def __len__(self):
         return len(self._packages)
@@ -48,61 +67,98 @@ class PackageSet:
         return pkg_spec in self._packages and self._packages[pkg_spec] == package
 
     def unsatisfied_dependencies(self) -> Iterator[Tuple[Dependency, FrozenSet[Package]]]:
-        for (pkg_name, pkg_source), deps in sorted(
-                # try the dependencies with the most options first
-                self._unsatisfied.items(),
-                key=lambda x: (len(x[1]), x[0])
-        ):
-            if len(deps) == 0:
-                continue
-            elif len(deps) == 1:
+        # try the dependencies with the most options first; the order is produced lazily from a heap, because
+        # the caller starts exploring (and pushing new resolutions) after each dependency it is given
+        order = [(len(deps), dep_spec) for dep_spec, deps in self._unsatisfied.items() if deps]
+        heapq.heapify(order)
+        while order:
+            _, (pkg_name, pkg_source) = heapq.heappop(order)
+            deps = self._unsatisfied[(pkg_name, pkg_source)]
+            if len(deps) == 1:
                 dep, packages = next(iter(deps.items()))
             else:
                 # there are multiple requirements for the same dependency
-                spec = CompoundSpec(*(d.semantic_version for d in deps.keys()))
+                spec = _compound_spec(tuple(d.semantic_version for d in deps.keys()))
                 dep = Dependency(pkg_name, pkg_source, spec)
-                packages = {
-                    p
-                    for packages in deps.values()
-                    for p in packages
-                }
+                packages = chain.from_iterable(deps.values())  # type: ignore
 
             yield dep, frozenset(packages)
 
     def copy(self) -> "PackageSet":
         ret = PackageSet()
-        ret._packages = self._packages.copy()
-        ret._unsatisfied = defaultdict(lambda: defaultdict(set))
-        for dep_spec, deps in self._unsatisfied.items():
-            ret._unsatisfied[dep_spec] = defaultdict(set)
-            for dep, packages in deps.items():
-                ret._unsatisfied[dep_spec][dep] = set(packages)
-                assert all(p in ret for p in packages)
+        ret._packages = self._packages
+        ret._unsatisfied = self._unsatisfied
         ret.is_valid = self.is_valid
         ret.is_complete = self.is_complete
+        ret._hash = self._hash
+        ret._shared = self._shared = True
+        ret._owned_unsatisfied = set()
+        self._owned_unsatisfied = set()
         return ret
 
+    def _unshare(self):
+        if self._shared:
+            self._packages = self._packages.copy()
+            self._unsatisfied = self._unsatisfied.copy()
+            self._shared = False
+
+    def _own_unsatisfied(self, dep_spec: Tuple[str, str]) -> Dict[Dependency, Set[Package]]:
+        """Returns the unsatisfied dependencies for dep_spec, copying them first if they are shared"""
+        if self._owned_unsatisfied is not None and dep_spec not in self._owned_unsatisfied:
+            deps = {dep: set(packages) for dep, packages in self._unsatisfied.get(dep_spec, {}).items()}
+            self._unsatisfied[dep_spec] = deps
+            self._owned_unsatisfied.add(dep_spec)
+            return deps
+        return self._unsatisfied.setdefault(dep_spec, {})
+
+    def can_add(self, packages: Iterable[Package]) -> bool:
+        """Checks whether adding `packages` would keep this set valid, without copying or modifying the set"""
+        if not self.is_valid:
+            return False
+        added: Dict[Tuple[str, str], Package] = {}
+        for package in packages:
+            pkg_spec = (package.name, package.source)
+            existing = added.get(pkg_spec, self._packages.get(pkg_spec))
+            if existing is not None and existing.version != package.version:
+                return False
+            added[pkg_spec] = package
+            for dep in package.dependencies:
+                dep_spec = (dep.package, dep.source)
+                present = added.get(dep_spec, self._packages.get(dep_spec))
+                if present is not None and not dep.match(present):
+                    return False
+        return True
+
     def add(self, package: Package):
+        if not self.is_valid:
+            return
         pkg_spec = (package.name, package.source)
-        if pkg_spec in self._packages and self._packages[pkg_spec].version != package.version:
+        existing = self._packages.get(pkg_spec)
+        if existing is not None and existing.version != package.version:
             self.is_valid = False
-        if not self.is_valid:
             return
+        self._unshare()
+        if existing is None:
+            self._hash ^= hash(package)
         self._packages[pkg_spec] = package
-        if pkg_spec in self._unsatisfied:
+        unsatisfied = self._unsatisfied.get(pkg_spec)
+        if unsatisfied:
             # there are some existing packages that have unsatisfied dependencies that could be
-            # satisfied by this new package
-            for dep in list(self._unsatisfied[pkg_spec].keys()):
-                if dep.match(package):
-                    del self._unsatisfied[pkg_spec][dep]
-                    if len(self._unsatisfied[pkg_spec]) == 0:
-                        del self._unsatisfied[pkg_spec]
+            # satisfied by this new package; the (possibly shared) dict is only copied if some of them are
+            matched = [dep for dep in unsatisfied if dep.match(package)]
+            if len(matched) == len(unsatisfied):
+                del self._unsatisfied[pkg_spec]
+            elif matched:
+                unsatisfied = self._own_unsatisfied(pkg_spec)
+                for dep in matched:
+                    del unsatisfied[dep]
         # add any new unsatisfied dependencies for this package
         for dep in package.dependencies:
             dep_spec = (dep.package, dep.source)
-            if dep_spec not in self._packages:
-                self._unsatisfied[dep_spec][dep].add(package)
-            elif not dep.match(self._packages[dep_spec]):
+            satisfied_by = self._packages.get(dep_spec)
+            if satisfied_by is None:
+                self._own_unsatisfied(dep_spec).setdefault(dep, set()).add(package)
+            elif not dep.match(satisfied_by):
                 self.is_valid = False
                 break
 
@@ -110,24 +166,37 @@ class PackageSet:
 
 
 class PartialResolution:
+    __slots__ = ("_packages", "_dependencies", "_sorted_dependencies", "_edges", "parent", "packages", "_hash")
+
     def __init__(self, packages: Iterable[Package] = (), dependencies: Iterable[Package] = (),
                  parent: Optional["PartialResolution"] = None):
         self._packages: FrozenSet[Package] = frozenset(packages)
         self._dependencies: FrozenSet[Package] = frozenset(dependencies)
+        # sorted lazily by `dependencies()`; ancestors are shared by many resolutions, so they are only sorted once
+        self._sorted_dependencies: Optional[Tuple[Package, ...]] = None
+        # every (package, depends_on) edge up to the root, collected by the first call to `dependencies()`
+        self._edges: Optional[Tuple[Tuple[Package, Package], ...]] = None
         self.parent: Optional[PartialResolution] = parent
-        if self.parent is not None:
-            self.packages: PackageSet = self.parent.packages.copy()
+        if parent is None:
+            package_set = PackageSet()
+        elif not parent.packages.is_valid or not (self._packages or self._dependencies):
+            # nothing can be added to an invalid set, and there is nothing to add here, so the parent's set can be
+            # shared as is (a resolution's PackageSet is never modified after the resolution is constructed)
+            package_set = parent.packages
         else:
-            self.packages = PackageSet()
+            package_set = parent.packages.copy()
+        self.packages: PackageSet = package_set
         for package in self._packages:
-            self.packages.add(package)
-            if not self.is_valid:
+            package_set.add(package)
+            if not package_set.is_valid:
                 break
-        if self.is_valid:
+        if package_set.is_valid:
             for dep in self._dependencies:
-                self.packages.add(dep)
-                if not self.is_valid:
+                package_set.add(dep)
+                if not package_set.is_valid:
                     break
+        # the packages of a resolution do not change after construction, so its hash can be computed once up front
+        self._hash: int = hash(package_set)
 
     @property
     def is_valid(self) -> bool:
@@ -143,15 +212,20 @@ class PartialResolution:
     def add(self, packages: Iterable[Package], depends_on: Package) -> "PartialResolution":
         return PartialResolution(packages, (depends_on,), parent=self)
 
-    def packages(self) -> Iterator[Package]:
+    def __iter__(self) -> Iterator[Package]:
         yield from self.packages
 
-    __iter__ = packages
-
     def dependencies(self) -> Iterator[Tuple[Package, Package]]:
+        if self._edges is None:
+            self._edges = tuple(self._walk_dependencies())
+        return iter(self._edges)
+
+    def _walk_dependencies(self) -> Iterator[Tuple[Package, Package]]:
         pr: Optional[PartialResolution] = self
         while pr is not None:
-            for depends_on in sorted(pr._dependencies):
+            if pr._sorted_dependencies is None:
+                pr._sorted_dependencies = tuple(sorted(pr._dependencies))
+            for depends_on in pr._sorted_dependencies:
                 for package in pr._packages:
                     yield package, depends_on
             pr = pr.parent
@@ -160,13 +234,21 @@ class PartialResolution:
         return len(self.packages)
 
     def __eq__(self, other):
-        return isinstance(other, PartialResolution) and self.packages == other.packages
+        return isinstance(other, PartialResolution) and self._hash == other._hash and self.packages == other.packages
 
     def __hash__(self):
-        return hash(self.packages)
+        return self._hash
+
 
+def resolve_sbom(
+        root_package: Package, packages: PackageCache, order_ascending: bool = True, max_history: int = 1 << 20
+) -> Iterator[SBOM]:
+    """Yields the possible SBOMs for root_package
 
-def resolve_sbom(root_package: Package, packages: PackageCache, order_ascending: bool = True) -> Iterator[SBOM]:
+    Partial resolutions that were already explored are remembered so they are not explored again; at most
+    `max_history` of them are remembered (the oldest are forgotten first), which bounds memory usage at the cost of
+    possibly re-exploring a resolution that was forgotten.
+    """
     if not root_package.dependencies:
         yield SBOM((), (root_package,))
         return
@@ -177,10 +259,14 @@ def resolve_sbom(root_package: Package, packages: PackageCache, order_ascending:
         PartialResolution(packages=(root_package,))
     ]
 
-    history: Set[PartialResolution] = {
-        pr for pr in stack
+    history: "OrderedDict[PartialResolution, None]" = OrderedDict(
+        (pr, None) for pr in stack
         if pr.is_valid
-    }
+    )
+
+    # the same dependency comes up again in many different partial resolutions, so its candidates are only looked up
+    # and sorted once
+    sorted_matches: Dict[Dependency, Tuple[Package, ...]] = {}
 
     while stack:
         pr = stack.pop()
@@ -191,14 +277,17 @@ def resolve_sbom(root_package: Package, packages: PackageCache, order_ascending:
             continue
 
         for dep, required_by in pr.packages.unsatisfied_dependencies():
-            if not PartialResolution(packages=required_by, parent=pr).is_valid:
+            if not pr.packages.can_add(required_by):
                 continue
-            for match in sorted(
-                    packages.match(dep),
-                    key=lambda p: p.version,
-                    reverse=order_ascending
-            ):
+            matches = sorted_matches.get(dep)
+            if matches is None:
+                matches = sorted_matches[dep] = tuple(
+                    sorted(packages.match(dep), key=attrgetter("version"), reverse=order_ascending)
+                )
+            for match in matches:
                 next_pr = pr.add(required_by, match)
                 if next_pr.is_valid and next_pr not in history:
-                    history.add(next_pr)
+                    history[next_pr] = None
+                    if len(history) > max_history:
+                        history.popitem(last=False)
                     stack.append(next_pr)
@@ -20,14 +20,19 @@ class SBOM:
     def __init__(self, dependencies: Iterable[Tuple[Package, Package]] = (), root_packages: Iterable[Package] = ()):
         self.dependencies: FrozenSet[Tuple[Package, Package]] = frozenset(dependencies)
         self.root_packages: FrozenSet[Package] = frozenset(root_packages)
+        self._packages: Optional[FrozenSet[Package]] = None
+        self._hash: Optional[int] = None
 
     @property
     def packages(self) -> FrozenSet[Package]:
-        return self.root_packages | {
-            p
-            for deps in self.dependencies
-            for p in deps
-        }
+        # SBOMs are immutable, so the packages only need to be collected once
+        if self._packages is None:
+            self._packages = self.root_packages | {
+                p
+                for deps in self.dependencies
+                for p in deps
+            }
+        return self._packages
 
     def __str__(self):
         return ", ".join(p.full_name for p in sorted(self.packages))
@@ -67,36 +72,39 @@ class SBOM:
         if root_component is not None:
             bom.metadata.component = root_component
 
+        # build each library component once, no matter how many dependency edges it is part of
+        for pkg in {p for edge in self.dependencies for p in edge}.difference(expanded):
+            component = Component(
+                name=pkg.name,
+                type=ComponentType.LIBRARY,
+                version=str(pkg.version),
+                bom_ref=f"{pkg.full_name}@{pkg.version!s}"
+            )
+            bom.components.add(component)
+            expanded[pkg] = component
+
+        # `Bom.register_dependency` scans every registered dependency for its target, so register all of a package's
+        # dependencies in one call rather than one edge at a time
+        depends_on_components: Dict[Package, List[Component]] = {}
         for pkg, depends_on in self.dependencies:
-            if pkg not in expanded:
-                component = Component(
-                    name=pkg.name,
-                    type=ComponentType.LIBRARY,
-                    version=str(pkg.version),
-                    bom_ref=f"{pkg.full_name}@{pkg.version!s}"
-                )
-                bom.components.add(component)
-            else:
-                component = expanded[pkg]
-            if depends_on not in expanded:
-                d_component = Component(
-                    name=depends_on.name,
-                    type=ComponentType.LIBRARY,
-                    version=str(depends_on.version),
-                    bom_ref=f"{depends_on.full_name}@{depends_on.version!s}"
-                )
-                bom.components.add(d_component)
-            else:
-                d_component = expanded[depends_on]
-            bom.register_dependency(component, [d_component])
+            depends_on_components.setdefault(pkg, []).append(expanded[depends_on])
+        for pkg, components in depends_on_components.items():
+            bom.register_dependency(expanded[pkg], components)
 
         return bom
 
     def __or__(self, other: "SBOM") -> "SBOM":
+        # SBOMs are immutable, so merging with an empty SBOM can return the other side as is
+        if not other.dependencies and not other.root_packages:
+            return self
+        elif not self.dependencies and not self.root_packages:
+            return other
         return SBOM(self.dependencies | other.dependencies, self.root_packages | other.root_packages)
 
     def __hash__(self):
-        return hash((self.root_packages, self.dependencies))
+        if self._hash is None:
+            self._hash = hash((self.root_packages, self.dependencies))
+        return self._hash
 
     def __eq__(self, other):
         return isinstance(other, SBOM) and self.root_packages == other.root_packages \
@@ -4,7 +4,7 @@ from pathlib import Path
 import re
 import logging
 from threading import Lock
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from urllib import request
 
 from ..it_depends import APP_DIRS
@@ -27,28 +27,32 @@ def get_apt_packages() -> Tuple[str, ...]:
         return all_packages
 
 
+@functools.lru_cache(maxsize=4096)
+def _search_regex(package: str) -> "re.Pattern":
+    return re.compile(rf"^(lib)*{re.escape(package)}(\-*([0-9]*)(\.*))*(\-dev)*$")
+
+
 def search_package(package: str) -> str:
-    found_packages: List[str] = []
-    for apt_package in get_apt_packages():
-        if package.lower() not in apt_package:
-            continue
-        if re.match(
-            rf"^(lib)*{re.escape(package.lower())}(\-*([0-9]*)(\.*))*(\-dev)*$",
-            apt_package,
-        ):
-            found_packages.append(apt_package)
-    found_packages.sort(key=len, reverse=True)
+    package_lower = package.lower()
+    regex = _search_regex(package_lower)
+    # the substring test rules out almost all of the tens of thousands of apt packages before the regex is tried
+    found_packages: List[str] = [
+        apt_package for apt_package in get_apt_packages()
+        if package_lower in apt_package and regex.match(apt_package)
+    ]
     if not found_packages:
         raise ValueError(f"Package {package} not found in apt package list.")
-    logger.info(f"Found {len(found_packages)} matching packages, Choosing {found_packages[0]}")
-    return found_packages[0]
+    # max() returns the first of the longest matches, just like the stable reverse sort used to
+    longest = max(found_packages, key=len)
+    logger.info(f"Found {len(found_packages)} matching packages, Choosing {longest}")
+    return longest
 
 
 contents_db: Dict[str, List[str]] = {}
 _loaded_dbs: Set[Path] = set()
 
 
-@functools.lru_cache(maxsize=5242880)
+@functools.lru_cache(maxsize=4096)
 def _file_to_package_contents(filename: str, arch: str = "amd64"):
     """
     Downloads and uses apt-file database directly
@@ -67,21 +71,21 @@ def _file_to_package_contents(filename: str, arch: str = "amd64"):
         )
     if not dbfile in _loaded_dbs:
         logger.info("Rebuilding contents db")
-        with gzip.open(str(dbfile), "rt") as contents:
-            for line in contents.readlines():
-                filename_i, *packages_i = re.split(r"\s+", line[:-1])
-                assert len(packages_i) > 0
-                contents_db.setdefault(filename_i, []).extend(packages_i)
+        # decode as UTF-8 regardless of the locale, so that a stray undecodable path cannot abort the load
+        with gzip.open(str(dbfile), "rt", encoding="utf-8", errors="replace") as contents:
+            for line in contents:
+                # each line is a path (which may contain spaces) followed by whitespace and the packages field
+                filename_i, packages_i = line.rsplit(None, 1)
+                contents_db.setdefault(filename_i, []).append(packages_i)
         _loaded_dbs.add(dbfile)
 
-    regex = re.compile("(.*/)+" + filename + "$")
     matches = 0
-    for (filename_i, packages_i) in contents_db.items():
-        if regex.match(filename_i):
-            matches += 1
-            for package_i in packages_i:
-                if selected is None or len(selected[0]) > len(filename_i):
-                    selected = filename_i, package_i
+    # the contents db has millions of entries, so the scan itself runs in `filter` rather than in a Python loop
+    for filename_i in filter(_path_matcher(filename), contents_db):
+        matches += 1
+        for package_i in contents_db[filename_i]:
+            if selected is None or len(selected[0]) > len(filename_i):
+                selected = filename_i, package_i
     if selected:
         logger.info(f"Found {matches} matching packages for {filename}. Choosing {selected[1]}")
     else:
@@ -89,31 +93,101 @@ def _file_to_package_contents(filename: str, arch: str = "amd64"):
     return selected[1]
 
 
-@functools.lru_cache(maxsize=5242880)
+@functools.lru_cache(maxsize=4096)
 def file_to_packages(filename: str, arch: str = "amd64") -> List[str]:
     if arch not in ("amd64", "i386"):
         raise ValueError("Only amd64 and i386 supported")
     logger.debug(f'Running [{" ".join(["apt-file", "-x", "search", filename])}]')
-    contents = run_command("apt-file", "-x", "search", filename).decode("utf-8")
+    contents = run_command("apt-file", "-x", "search", filename)
     selected: List[str] = []
-    for line in contents.split("\n"):
+    # only the package names are needed, so only they are decoded (not the paths, which are most of the output)
+    for line in contents.split(b"\n"):
         if not line:
             continue
-        package_i, _ = line.split(": ")
-        selected.append(package_i)
+        package_i, _ = line.split(b": ", 1)
+        selected.append(package_i.decode("utf-8"))
     return sorted(selected)
 
 
 def file_to_package(filename: str, arch: str = "amd64") -> str:
     packages = file_to_packages(filename, arch)
     if packages:
-        _, result = min((len(pkg), pkg) for pkg in packages)
+        # `packages` is sorted, so the first of the shortest packages is also the alphabetically smallest
+        result = min(packages, key=len)
         logger.info(f"Found {len(packages)} matching packages for {filename}. Choosing {result}")
         return result
     else:
         raise ValueError(f"{filename} not found in apt-file")
 
 
+_REGEX_SPECIAL_CHARACTERS = frozenset(".^$*+?{}[]|()")
+
+
+@functools.lru_cache(maxsize=4096)
+def _required_suffix(pattern: str) -> str:
+    """
+    Returns a literal string that every file matched by the regular expression `pattern` must contain: the literal
+    text at the end of the pattern (e.g., `foo.h` for `include/(.*/)*foo\\.h`). Returns the empty string if there is
+    no such text, or if the pattern has a top-level alternative, an extension group like `(?i)`, or a numeric escape.
+    """
+    suffix: List[str] = []
+    depth = 0
+    escaped = False
+    # the index at which the character class we are in started, or -1 if we are not in one
+    class_start = -1
+    for i, c in enumerate(pattern):
+        if escaped:
+            escaped = False
+            if class_start >= 0:
+                # an escape inside `[...]` is just part of the class
+                continue
+            if c in "xuUN" or c.isdigit():
+                # a numeric or named escape (like \x41 or \101) or a back reference, whose following characters
+                # are part of the escape rather than literal text
+                return ""
+            if c.isalnum():
+                # a character class like \d or \s
+                suffix = []
+            else:
+                suffix.append(c)
+        elif c == "\\":
+            escaped = True
+        elif class_start >= 0:
+            # inside `[...]` nothing is grouping or alternation; a `]` right after `[` or `[^` is a literal `]`
+            if c == "]" and i > class_start + 1 and not (i == class_start + 2 and pattern[class_start + 1] == "^"):
+                class_start = -1
+        elif c in _REGEX_SPECIAL_CHARACTERS:
+            suffix = []
+            if c == "[":
+                class_start = i
+            elif c == "(":
+                if pattern.startswith("(?", i) and not pattern.startswith("(?:", i):
+                    # inline flags (like `(?i)`), lookarounds, and the like could change what the text matches
+                    return ""
+                depth += 1
+            elif c == ")":
+                depth -= 1
+            elif c == "|" and depth == 0:
+                return ""
+        else:
+            suffix.append(c)
+    return "".join(suffix)
+
+
+@functools.lru_cache(maxsize=4096)
+def _path_matcher(pattern: str) -> Callable[[str], Any]:
+    """
+    Returns a function that checks whether a path ends with a "/" followed by a match of the regular expression
+    `pattern`; i.e., whether `re.match("(.*/)+" + pattern + "$", path)`, but without that regex's backtracking.
+    Literal patterns (like `re.escape("foo.h")`) are checked with `str.endswith`.
+    """
+    literal = _required_suffix(pattern)
+    if literal and re.escape(literal) == pattern:
+        needle = f"/{literal}"
+        return lambda path: path.endswith(needle)
+    return re.compile(f"/(?:{pattern})$").search
+
+
 def cached_file_to_package(
     pattern: str, file_to_package_cache: Optional[List[Tuple[str, str]]] = None
 ) -> str:
@@ -121,9 +195,11 @@ def cached_file_to_package(
     # dependencies. If a file pattern is already sastified by current files
     # use the package already included as a dependency
     if file_to_package_cache is not None:
-        regex = re.compile("(.*/)+" + pattern + "$")
+        matches = _path_matcher(pattern)
+        # a cheap substring test rules out most of the cached files before the regex is tried
+        suffix = _required_suffix(pattern)
         for package_i, filename_i in file_to_package_cache:
-            if regex.match(filename_i):
+            if suffix in filename_i and matches(filename_i):
                 return package_i
 
     package = file_to_package(pattern)
@@ -33,14 +33,16 @@ def is_running_ubuntu(check_version: Optional[str] = None) -> bool:
     is_ubuntu = False
     version: Optional[str] = None
     with open(os_release_path, "r") as f:
-        for line in f.readlines():
+        for line in f:
             line = line.strip()
-            is_ubuntu = is_ubuntu or bool(_UBUNTU_NAME_MATCH.match(line))
+            # cheap substring tests first, so that the regexes only run on the lines that could match them
+            lowered = line.lower()
+            is_ubuntu = is_ubuntu or ("ubuntu" in lowered and bool(_UBUNTU_NAME_MATCH.match(line)))
             if check_version is None:
                 if is_ubuntu:
                     return True
             elif version is None:
-                m = _VERSION_ID_MATCH.match(line)
+                m = _VERSION_ID_MATCH.match(line) if "version_id" in lowered else None
                 if m:
                     version = m.group(1)
             else:
@@ -55,24 +57,30 @@ def run_command(*args: str) -> bytes:
     If the host system is not running Ubuntu 20.04, the command is run in Docker.
 
     """
-    with _UBUNTU_LOCK:
-        global _container
-        if _container is None:
-            with InMemoryDockerfile(
-                """FROM ubuntu:20.04
+    global _container
+    # double-checked, so the lock is only contended until the container has been built
+    if _container is None:
+        with _UBUNTU_LOCK:
+            if _container is None:
+                with InMemoryDockerfile(
+                    """FROM ubuntu:20.04
 
 RUN apt-get update && apt-get install -y apt-file && apt-file update
 """
-            ) as dockerfile:
-                _container = DockerContainer("trailofbits/it-depends-apt", dockerfile=dockerfile)
-                _container.rebuild()
+                ) as dockerfile:
+                    container = DockerContainer("trailofbits/it-depends-apt", dockerfile=dockerfile)
+                    container.rebuild()
+                # only publish the container once it is built, so other threads never run against a partial image
+                _container = container
     logger.debug(f"running {' '.join(args)} in Docker")
+    # the image was built above, so don't list every local Docker image again on each invocation
     p = _container.run(
         *args,
         interactive=False,
         stdout=subprocess.PIPE,
         stderr=subprocess.DEVNULL,
         rebuild=False,
+        check_existence=False,
     )
     if p.returncode != 0:
         raise subprocess.CalledProcessError(p.returncode, cmd=f"{' '.join(args)}")
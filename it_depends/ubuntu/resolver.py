@@ -30,9 +30,22 @@ class UbuntuResolver(DependencyResolver):
     name = "ubuntu"
     description = "expands dependencies based upon Ubuntu package dependencies"
 
-    _pattern = re.compile(r" *(?P<package>[^ ]*)( *\((?P<version>.*)\))? *")
+    # one dependency in a Depends line, like `coreutils (>= 7.3)`; alternatives are separated by "|", and ANDed
+    # dependencies by ","
+    _dependency_pattern = re.compile(r"(?P<package>[^\s,|()]+)(?:\s*\((?P<version>[^)]*)\))?")
     _ubuntu_version = re.compile("([0-9]+:)*(?P<version>[^-]*)(-.*)*")
 
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_dependency_version(version: Optional[str]) -> SimpleSpec:
+        """Parses the version of a dependency in a Depends line. Only a few distinct versions come up again and again,
+        so each is only parsed once."""
+        try:
+            # remove trailing ubuntu versions like "-10ubuntu4":
+            return SimpleSpec(version.split("-", maxsplit=1)[0].replace(" ", ""))  # type: ignore
+        except Exception:
+            return SimpleSpec("*")  # Yolo FIXME Invalid simple block '= 1:7.0.1-12'
+
     @staticmethod
     @lru_cache(maxsize=2048)
     def ubuntu_packages(package_name: str) -> Iterable[Package]:
@@ -70,34 +83,19 @@ class UbuntuResolver(DependencyResolver):
                     logger.warning(f"Failed to parse package {package_name} {line}")
             elif version is not None and line.startswith("Depends: "):
                 deps = []
-                for dep in line[9:].split(","):
-                    for or_segment in dep.split("|"):
-                        # Fixme: For now, treat each ORed dependency as a separate ANDed dependency
-                        matched = UbuntuResolver._pattern.match(or_segment)
-                        if not matched:
-                            raise ValueError(
-                                f"Invalid dependency line in apt output for {package_name}: {line!r}"
-                            )
-                        dep_package = matched.group("package")
-                        dep_version = matched.group("version")
-                        try:
-                            # remove trailing ubuntu versions like "-10ubuntu4":
-                            dep_version = dep_version.split("-", maxsplit=1)[0]
-                            dep_version = dep_version.replace(" ", "")
-                            SimpleSpec(dep_version.replace(" ", ""))
-                        except Exception as e:
-                            dep_version = "*"  # Yolo FIXME Invalid simple block '= 1:7.0.1-12'
-
-                        deps.append((dep_package, dep_version))
+                # Fixme: For now, treat each ORed dependency as a separate ANDed dependency
+                for matched in UbuntuResolver._dependency_pattern.finditer(line, len("Depends: ")):
+                    dep_package, dep_version = matched.group("package", "version")
+                    deps.append((dep_package, UbuntuResolver._parse_dependency_version(dep_version)))
 
                 packages[(package_name, version)].append(
                     [
                         Dependency(
                             package=pkg,
-                            semantic_version=SimpleSpec(ver),
+                            semantic_version=spec,
                             source=UbuntuResolver(),
                         )
-                        for pkg, ver in deps
+                        for pkg, spec in deps
                     ]
                 )
                 version = None
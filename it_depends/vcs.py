@@ -7,11 +7,13 @@ Logic largely taken from the implementation of `go get`:
 """
 import sys
 from dataclasses import dataclass
+import functools
 import os
 import re
 from re import Pattern
+import signal
 import subprocess
-from typing import Callable, cast, Dict, Iterable, List, Optional, Type, TypeVar
+from typing import Any, Callable, cast, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
 
 
 class VCSResolutionError(ValueError):
@@ -25,6 +27,55 @@ class GoVCSConfigError(VCSResolutionError):
 T = TypeVar("T")
 
 
+def _kill_process_group(proc: subprocess.Popen):
+    """Kills a probe that is no longer needed, along with any children it spawned (e.g., ssh)"""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+    proc.wait()
+
+
+@functools.lru_cache(maxsize=1024)
+def _ping(
+    vcs_name: str, repo: str, cmd: str, schemes: Tuple[str, ...], ping_cmd: Tuple[str, ...]
+) -> Optional[str]:
+    """
+    Implements `VCS.ping`. The cache is keyed on the VCS's name and `repo` (and the command that probes them) rather
+    than on the `VCS` itself, so that it never keeps a `VCS` alive.
+    """
+    env = {"GIT_TERMINAL_PROMPT": "0"}
+    if os.environ.get("GIT_SSH", "") == "" and os.environ.get("GIT_SSH_COMMAND", "") == "":
+        # disable any ssh connection pooling by git
+        env["GIT_SSH_COMMAND"] = "ssh -o ControlMaster=no"
+    # probe every scheme concurrently, but still prefer schemes in the order they are listed: a scheme is only
+    # returned once all of the schemes before it have failed
+    procs: List[subprocess.Popen] = []
+    try:
+        for scheme in schemes:
+            args = [cmd] + [c.replace("{scheme}", scheme).replace("{repo}", repo) for c in ping_cmd]
+            procs.append(
+                subprocess.Popen(
+                    args,
+                    stdout=subprocess.DEVNULL,
+                    stdin=subprocess.DEVNULL,
+                    env=env,
+                    start_new_session=True,
+                )
+            )
+        for scheme, proc in zip(schemes, procs):
+            if proc.wait() == 0:
+                return scheme
+        return None
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                _kill_process_group(proc)
+
+
 class VCS:
     _DEFAULT_INSTANCE: "VCS"
 
@@ -42,20 +93,14 @@ class VCS:
         return cast(T, getattr(cls, "_DEFAULT_INSTANCE"))
 
     def ping(self, repo: str) -> Optional[str]:
-        env = {"GIT_TERMINAL_PROMPT": "0"}
-        if os.environ.get("GIT_SSH", "") == "" and os.environ.get("GIT_SSH_COMMAND", "") == "":
-            # disable any ssh connection pooling by git
-            env["GIT_SSH_COMMAND"] = "ssh -o ControlMaster=no"
-        for scheme in self.scheme:
-            cmd = [self.cmd] + [
-                c.replace("{scheme}", scheme).replace("{repo}", repo) for c in self.ping_cmd
-            ]
-            if (
-                subprocess.call(cmd, stdout=subprocess.DEVNULL, stdin=subprocess.DEVNULL, env=env)
-                == 0
-            ):
-                return scheme
-        return None
+        """
+        Returns the first scheme in `self.scheme` over which `repo` is reachable, or None if none are.
+
+        Results (including negative ones) are cached for the life of the process, since the same handful of hosts
+        tend to be probed over and over while resolving a dependency tree.
+
+        """
+        return _ping(self.name, repo, self.cmd, tuple(self.scheme), tuple(self.ping_cmd))
 
     def __hash__(self):
         return hash(self.name)
@@ -75,6 +120,8 @@ class Git(VCS):
 
 
 VCSes: List[VCS] = [vcs.default_instance() for vcs in (Git,)]
+_VCS_BY_CMD: Dict[str, VCS] = {vcs.cmd: vcs for vcs in VCSes}
+_VCS_SUFFIXES: Tuple[str, ...] = tuple(f".{vcs.cmd}" for vcs in VCSes)
 
 # VCS_MOD is a stub for the "mod" scheme. It's returned by
 # repoRootForImportPathDynamic, but is otherwise not treated as a VCS command.
@@ -110,6 +157,9 @@ class VCSPath:
     check: Optional[Callable[[Match], None]] = None
     vcs: Optional[str] = None
     schemeless_repo: bool = False
+    # optional cheap search that must succeed for `regexp` to be able to match; it lets us skip `regexp` (which may
+    # backtrack heavily on paths it does not match) for the common case of paths that cannot match
+    prefilter: Optional[REGEXP_TYPE] = None
 
 
 class VCSMatchError(VCSResolutionError):
@@ -122,17 +172,33 @@ def no_vcs_suffix(match: Match):
     The usual culprit is ".git".
 
     """
-    repo = match.repo
-    for vcs in VCSes:
-        if repo.endswith(f".{vcs.cmd}"):
-            raise VCSMatchError(f"Invalid version control suffix in {match.prefix!r} path")
+    if match.repo.endswith(_VCS_SUFFIXES):
+        raise VCSMatchError(f"Invalid version control suffix in {match.prefix!r} path")
 
 
 VCS_PATHS: List[VCSPath] = []
+# VCS_PATHS flattened into (path_prefix, prefilter.search, regexp.match, VCSPath) tuples, so that `resolve` does not
+# have to look up the same attributes and bound methods on every call
+_RESOLVERS: Tuple[Tuple[str, Optional[Callable[[str], Any]], Callable[[str], Any], VCSPath], ...] = ()
+# `resolve.cache_clear`, once `resolve` is defined; the paths this module registers before then need no clearing
+_clear_resolve_cache: Optional[Callable[[], None]] = None
 
 
 def _register(path: VCSPath) -> VCSPath:
+    global _RESOLVERS
     VCS_PATHS.append(path)
+    _RESOLVERS = tuple(
+        (
+            service.path_prefix,
+            None if service.prefilter is None else service.prefilter.search,
+            service.regexp.match,
+            service,
+        )
+        for service in VCS_PATHS
+    )
+    if _clear_resolve_cache is not None:
+        # a newly registered path can change how an already resolved path resolves
+        _clear_resolve_cache()
     return path
 
 
@@ -156,11 +222,12 @@ GENERAL_REPO = _register(
             r"(?P<vcs>bzr|fossil|git|hg|svn))(/~?[A-Za-z0-9_.\-]+)*$"
         ),
         schemeless_repo=True,
+        prefilter=re.compile(r"\.(?:bzr|fossil|git|hg|svn)(?:/|$)"),
     )
 )
 
 
-@dataclass
+@dataclass(frozen=True)
 class Repository:
     repo: str
     root: str
@@ -170,10 +237,7 @@ class Repository:
 
 def vcs_by_cmd(cmd: str) -> Optional[VCS]:
     """vcsByCmd returns the version control system for the given command name (hg, git, svn, bzr)."""
-    for vcs in VCSes:
-        if cmd == vcs.cmd:
-            return vcs
-    return None
+    return _VCS_BY_CMD.get(cmd)
 
 
 @dataclass
@@ -243,15 +307,26 @@ def check_go_vcs(vcs: VCS, root: str):
     # }
 
 
+@functools.lru_cache(maxsize=4096)
 def resolve(path: str) -> Repository:
-    for service in VCS_PATHS:
-        if not path.startswith(service.path_prefix):
+    """
+    Resolves a Go-style import path to the repository that hosts it.
+
+    Results are cached, since the same import roots are resolved over and over across a dependency tree; this is safe
+    because `Repository` is frozen and the GOVCS rules are only read once per process. Failures are not cached.
+
+    """
+    for path_prefix, prefilter, regexp_match, service in _RESOLVERS:
+        if not path.startswith(path_prefix):
             continue
-        m = service.regexp.match(path)
+        if prefilter is None or prefilter(path):
+            m = regexp_match(path)
+        else:
+            m = None
         if m is None:
-            if service.path_prefix:
-                raise VCSMatchError(f"Invalid {service.path_prefix} import path {path!r}")
-        match = Match(prefix=f"{service.path_prefix}/", import_path=path)
+            if path_prefix:
+                raise VCSMatchError(f"Invalid {path_prefix} import path {path!r}")
+        match = Match(prefix=f"{path_prefix}/", import_path=path)
         if m:
             for name, value in m.groupdict().items():
                 if name and value:
@@ -277,3 +352,6 @@ def resolve(path: str) -> Repository:
             repo_url = f"{scheme}://{match.repo}"
         return Repository(repo=repo_url, root=match.root, vcs=vcs)
     raise VCSResolutionError(f"Unable to resolve repository for {path!r}")
+
+
+_clear_resolve_cache = resolve.cache_clear
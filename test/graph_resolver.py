@@ -0,0 +1,52 @@
+"""
+A resolver over a small, fixed dependency graph, for tests that run resolvers in worker processes.
+
+It lives in its own module so that worker processes can import it when the resolver is unpickled.
+Importing it registers the resolver, so tests should only import it when they need it and unregister
+it afterwards.
+"""
+from typing import Dict, Iterator, List, Tuple
+
+from it_depends.dependencies import Dependency, DependencyResolver, Package, SimpleSpec, Version
+
+# (package, version) -> [(dependency, version specification)]
+GRAPH: Dict[Tuple[str, str], List[Tuple[str, str]]] = {
+    ("lib-a", "1.0.0"): [("lib-b", ">=1.0.0"), ("lib-c", "*")],
+    ("lib-a", "2.0.0"): [("lib-b", ">=2.0.0")],
+    ("lib-b", "1.0.0"): [("lib-c", "<2.0.0")],
+    ("lib-b", "2.0.0"): [("lib-c", "*"), ("lib-d", "*")],
+    ("lib-c", "1.0.0"): [],
+    ("lib-c", "2.0.0"): [("lib-d", ">=1.0.0")],
+    ("lib-d", "1.0.0"): [],
+}
+
+
+class GraphResolver(DependencyResolver):
+    name = "test-graph"
+    description = "Resolves dependencies from a fixed graph (used for testing)"
+
+    def resolve(self, dependency: Dependency) -> Iterator[Package]:
+        for (package, version), dependencies in GRAPH.items():
+            if package == dependency.package and Version(version) in dependency.semantic_version:
+                yield Package(
+                    name=package,
+                    version=version,
+                    source=self.name,
+                    dependencies=[
+                        Dependency(package=dep, source=self.name, semantic_version=SimpleSpec(spec))
+                        for dep, spec in dependencies
+                    ],
+                )
+
+    def can_resolve_from_source(self, repo) -> bool:
+        return False
+
+    def resolve_from_source(self, repo, cache=None):
+        return None
+
+    def can_update_dependencies(self, package: Package) -> bool:
+        return package.source == self.name and package.name == "app"
+
+    def update_dependencies(self, package: Package) -> Package:
+        lib_a = Dependency(package="lib-a", source=self.name)
+        return package.update_dependencies(frozenset({lib_a}))
@@ -1,9 +1,29 @@
+import re
 from unittest import TestCase
 
-from it_depends.ubuntu.apt import file_to_packages
+from it_depends.ubuntu.apt import _required_suffix, file_to_packages
 
 
 class TestAPT(TestCase):
+    def test_required_suffix(self):
+        self.assertEqual(_required_suffix(re.escape("zlib.pc")), "zlib.pc")
+        self.assertEqual(_required_suffix(r"include/(.*/)*" + re.escape("sys/types.h")), "sys/types.h")
+        self.assertEqual(_required_suffix(r"libfoo\d+\.so"), ".so")
+        self.assertEqual(_required_suffix(r"lib(a|b)(\.so[0-9\.]*|\.a)"), "")
+        self.assertEqual(_required_suffix(r"a\.h|b\.h"), "")
+        # `(` and `|` inside a character class are neither grouping nor alternation
+        self.assertEqual(_required_suffix(r"[(]x|y"), "")
+        self.assertEqual(_required_suffix(r"[]|]x"), "x")
+        self.assertEqual(_required_suffix(r"lib[^/]*\.so"), ".so")
+        self.assertEqual(_required_suffix(r"(?i)foo\.h"), "")
+        # the characters after a numeric or named escape belong to the escape
+        self.assertEqual(_required_suffix(r"\x41"), "")
+        self.assertEqual(_required_suffix(r"\101"), "")
+        self.assertEqual(_required_suffix(r"\u0041"), "")
+        self.assertEqual(_required_suffix(r"\U00000041"), "")
+        self.assertEqual(_required_suffix(r"\N{LATIN CAPITAL LETTER A}"), "")
+        self.assertEqual(_required_suffix(r"(a)x\1"), "")
+
     def test_file_to_package(self):
         self.assertEqual(file_to_packages("/usr/bin/python3"), [
             'python3-activipy',
@@ -39,6 +39,7 @@ class TestDB(TestCase):
                                                    source=UnusedResolver()),))
             cache.add(pkg)
             self.assertIn(pkg, cache)
+            self.assertNotIn(Package(name="package", version=Version.coerce("2.0.0"), source=UnusedResolver()), cache)
             self.assertEqual(len(cache), 1)
             # re-adding the package should be a NO-OP
             cache.add(pkg)
@@ -47,3 +48,12 @@ class TestDB(TestCase):
             smaller_pkg = Package(name="package", version=Version.coerce("1.0.0"), source=UnusedResolver())
             self.assertRaises(ValueError, cache.add, smaller_pkg)
 
+    def test_contains_is_exact(self):
+        with DBPackageCache() as cache:
+            UnusedResolver = self.unknown
+            pkg = Package(name="lib_foo", version=Version.coerce("1.0.0"), source=UnusedResolver())
+            cache.add(pkg)
+            self.assertIn(pkg, cache)
+            # neither LIKE wildcards nor case differences should match
+            self.assertNotIn(Package(name="lib-foo", version=Version.coerce("1.0.0"), source=UnusedResolver()), cache)
+            self.assertNotIn(Package(name="Lib_Foo", version=Version.coerce("1.0.0"), source=UnusedResolver()), cache)
@@ -0,0 +1,140 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+import gc
+from typing import List
+from unittest import TestCase
+from unittest.mock import patch
+
+from it_depends.db import DBPackageCache
+from it_depends.dependencies import (
+    _make_pool,
+    Dependency,
+    DependencyResolver,
+    is_known_resolver,
+    Package,
+    resolve,
+    resolver_by_name,
+    resolvers,
+    SimpleSpec,
+)
+
+
+class TestDependencyResolverRegistry(TestCase):
+    def tearDown(self) -> None:
+        # drop the resolvers defined by the test from the (weak) registry
+        resolvers.cache_clear()
+        resolver_by_name.cache_clear()
+        gc.collect()
+
+    def test_only_direct_subclasses_are_registered(self):
+        class BaseResolver(DependencyResolver):
+            name = "test-registry-base"
+            description = "Used for testing"
+
+        class DerivedResolver(BaseResolver):
+            name = "test-registry-derived"
+            description = "Used for testing"
+
+        self.assertTrue(is_known_resolver("test-registry-base"))
+        self.assertIs(resolver_by_name("test-registry-base"), BaseResolver())
+        self.assertIn(BaseResolver(), resolvers())
+        self.assertFalse(is_known_resolver("test-registry-derived"))
+        self.assertNotIn("test-registry-derived", {r.name for r in resolvers()})
+        with self.assertRaises(KeyError):
+            resolver_by_name("test-registry-derived")
+
+
+class TestResolve(TestCase):
+    def tearDown(self) -> None:
+        resolvers.cache_clear()
+        resolver_by_name.cache_clear()
+        gc.collect()
+
+    def test_owned_pool_is_shut_down_when_a_resolver_raises(self):
+        class RaisingResolver(DependencyResolver):
+            name = "test-raising"
+            description = "Used for testing"
+
+            def resolve(self, dependency):
+                raise RuntimeError("resolver failure")
+
+            def can_resolve_from_source(self, repo) -> bool:
+                return False
+
+            def resolve_from_source(self, repo, cache=None):
+                return None
+
+        created_pools: List[Executor] = []
+
+        def make_pool(executor: str, max_workers: int) -> Executor:
+            created_pools.append(_make_pool(executor, max_workers))
+            return created_pools[-1]
+
+        with patch("it_depends.dependencies._make_pool", make_pool):
+            with self.assertRaises(RuntimeError):
+                resolve(Dependency(package="foo", source="test-raising"), max_workers=2)
+        self.assertEqual(len(created_pools), 1)
+        # a pool that was shut down refuses any new work
+        with self.assertRaisesRegex(RuntimeError, "shutdown"):
+            created_pools[0].submit(int)
+
+
+class TestResolveExecutors(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        # imported here rather than at the top of the module, so that the resolver is only
+        # registered while these tests run
+        from .graph_resolver import GraphResolver
+
+        cls.resolver = GraphResolver
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        DependencyResolver._registry.pop(cls.resolver.name, None)
+        resolvers.cache_clear()
+        resolver_by_name.cache_clear()
+
+    def resolve_graph(self, **kwargs) -> List[str]:
+        dependency = Dependency(package="lib-a", source=self.resolver.name)
+        repo = resolve(dependency, max_workers=2, **kwargs)
+        return sorted(str(package) for package in repo)
+
+    def test_process_executor(self):
+        expected = self.resolve_graph(executor="thread")
+        self.assertEqual(len(expected), 7)
+        self.assertEqual(self.resolve_graph(executor="process"), expected)
+
+    def test_process_executor_updates_root_package(self):
+        # worker processes update a copy of the root package; resolve() must merge it back
+        thread_root = Package(name="app", version="1.0.0", source=self.resolver.name)
+        thread_repo = resolve(thread_root, max_workers=2, executor="thread")
+        process_root = Package(name="app", version="1.0.0", source=self.resolver.name)
+        process_repo = resolve(process_root, max_workers=2, executor="process")
+        self.assertIn(
+            Dependency(package="lib-a", source=self.resolver.name), process_root.dependencies
+        )
+        self.assertEqual(process_root.dependencies, thread_root.dependencies)
+        self.assertEqual(
+            sorted(str(package) for package in process_repo),
+            sorted(str(package) for package in thread_repo),
+        )
+
+    def test_process_executor_does_not_cache_root_resolution(self):
+        # workers return copies of the root dependency, which must still not be cached as resolved
+        for executor in ("thread", "process"):
+            with DBPackageCache() as cache:
+                root = Dependency(package="lib-a", source=self.resolver.name)
+                resolve(root, cache=cache, max_workers=2, executor=executor)
+                self.assertFalse(cache.was_resolved(root), executor)
+                lib_b = Dependency(
+                    package="lib-b",
+                    source=self.resolver.name,
+                    semantic_version=SimpleSpec(">=1.0.0"),
+                )
+                self.assertTrue(cache.was_resolved(lib_b), executor)
+
+    def test_caller_owned_pool(self):
+        expected = self.resolve_graph(executor="thread")
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            self.assertEqual(self.resolve_graph(pool=pool), expected)
+            # the pool belongs to the caller, so resolve() must have left it running
+            self.assertEqual(pool.submit(int).result(), 0)
@@ -1,6 +1,7 @@
 from unittest import TestCase
 
-from it_depends.resolver import resolve_sbom
+from it_depends.dependencies import Package
+from it_depends.resolver import PackageSet, resolve_sbom
 from it_depends.sbom import cyclonedx_to_json
 
 from .test_smoke import SmokeTest
@@ -15,3 +16,24 @@ class TestResolver(TestCase):
                 # print(str(sbom))
                 print(cyclonedx_to_json(sbom.to_cyclonedx()))
                 break
+
+    def test_package_set_equality(self):
+        a = PackageSet()
+        b = PackageSet()
+        for package in ("pip:foo@1.0.0", "pip:bar@2.0.0"):
+            a.add(Package.from_string(package))
+        for package in ("pip:bar@2.0.0", "pip:foo@1.0.0"):
+            b.add(Package.from_string(package))
+        self.assertEqual(a, b)
+        self.assertEqual(hash(a), hash(b))
+        b.add(Package.from_string("pip:baz@1.0.0"))
+        self.assertNotEqual(a, b)
+
+    def test_package_set_can_add(self):
+        packages = PackageSet()
+        packages.add(Package.from_string("pip:foo@1.0.0"))
+        self.assertTrue(packages.can_add((Package.from_string("pip:foo@1.0.0"),)))
+        self.assertFalse(packages.can_add((Package.from_string("pip:foo@2.0.0"),)))
+        self.assertTrue(packages.can_add((Package.from_string("pip:bar@1.0.0"),)))
+        # can_add must not modify the set
+        self.assertEqual(len(packages), 1)
@@ -1,9 +1,54 @@
+from pathlib import Path
+import re
+import tempfile
 from unittest import TestCase
 
-from it_depends.vcs import resolve
+from it_depends import vcs as vcs_module
+from it_depends.vcs import resolve, VCS, VCSPath, VCSResolutionError
 
 
 class TestVCS(TestCase):
     def test_resolve(self):
         repo = resolve("github.com/trailofbits/graphtage")
         self.assertEqual(repo.vcs.name, "Git")
+
+    def test_resolve_unknown_vcs(self):
+        # a deeply dotted host with no VCS suffix used to make the GENERAL_REPO regex backtrack for milliseconds
+        with self.assertRaises(VCSResolutionError):
+            resolve("a.b.c.d.e.f.g.h.i.j.k.l.m.n.o.p/q/r/s/t/u/v")
+
+    def test_ping_prefers_earlier_schemes(self):
+        # every scheme is probed concurrently, but the first listed scheme that succeeds must still win
+        vcs = VCS(
+            name="sh",
+            cmd="sh",
+            scheme=("fail", "slow", "fast"),
+            ping_cmd=("-c", 'case {scheme} in fail) exit 1;; slow) sleep 0.5;; esac'),
+        )
+        self.assertEqual(vcs.ping("repo"), "slow")
+        self.assertIsNone(VCS(name="sh-fail", cmd="sh", scheme=("a", "b"), ping_cmd=("-c", "exit 1")).ping("repo"))
+
+    def test_ping_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log = Path(tmpdir) / "pings"
+            vcs = VCS(name="sh-cached", cmd="sh", scheme=("a",), ping_cmd=("-c", f"echo {{repo}} >> {log}"))
+            self.assertEqual(vcs.ping("repo"), "a")
+            self.assertEqual(vcs.ping("repo"), "a")
+            self.assertEqual(vcs.ping("other"), "a")
+            self.assertEqual(log.read_text().split(), ["repo", "other"])
+
+    def test_resolve_is_cached(self):
+        self.assertIs(resolve("github.com/trailofbits/it-depends"), resolve("github.com/trailofbits/it-depends"))
+
+    def test_register_clears_resolve_cache(self):
+        resolve("github.com/trailofbits/it-depends")
+        self.assertGreater(resolve.cache_info().currsize, 0)
+        paths, resolvers = list(vcs_module.VCS_PATHS), vcs_module._RESOLVERS
+        try:
+            vcs_module._register(
+                VCSPath(path_prefix="example.com", regexp=re.compile(r"^(?P<root>example\.com/[^/]+)"))
+            )
+            self.assertEqual(resolve.cache_info().currsize, 0)
+        finally:
+            vcs_module.VCS_PATHS[:] = paths
+            vcs_module._RESOLVERS = resolvers